@@ -25,6 +25,10 @@ _FN_DENYLIST_REGEX = [
     r'thnn_conv_depthwise2d_backward.grad_input',
     # XLA/TPU functions
 ]
+# requires_backend_wrapper() runs for every operator in every output file,
+# so match against a single precompiled alternation instead of re-looking up
+# each pattern in re's cache.
+_FN_DENYLIST_RE = re.compile('|'.join(f'(?:{frx})' for frx in _FN_DENYLIST_REGEX))
 
 # TODO: remove this list.
 # Instead, the codegen will figure out which ops to generate _out wrappers for
@@ -75,7 +79,7 @@ def requires_backend_wrapper(f: ExternalBackendFunction) -> bool:
     requires_lowering = not any(is_generic_dispatch_key(k) for k in f.native_function.dispatch) \
         and not has_autogenerated_composite_kernel(f.native_function)
     has_xla_lowering = f.metadata is not None
-    in_denylist = any([re.match(frx, str(f.native_function.func.name)) for frx in _FN_DENYLIST_REGEX])
+    in_denylist = _FN_DENYLIST_RE.match(str(f.native_function.func.name)) is not None
     return not in_denylist and (requires_lowering or has_xla_lowering)
 
 def xla_tensor_creation_api(
@@ -184,7 +188,6 @@ class GenExternalAtenFallback:
             # probably because they based their signatures off of our RegistrationDeclarations.h
             dispatcher_sig = DispatcherSignature.from_schema(f.native_function.func)
             name = dispatcher_sig.name()
-            args = dispatcher_sig.arguments()
 
             if self.target is Target.NAMESPACED_DECLARATION:
                 return f"  static {dispatcher_sig.decl()};"
@@ -77,7 +77,9 @@ class LineLoader(Loader):
 
 # Parse native_functions.yaml into a sequence of NativeFunctions
 def parse_native_yaml(path: str) -> List[NativeFunction]:
-    with open(path, 'r') as f:
+    # Hand libyaml a binary stream so it skips Python's text decoding; the
+    # stream's name still shows up in parse errors
+    with open(path, 'rb') as f:
         es = yaml.load(f, Loader=LineLoader)
     assert isinstance(es, list)
     rs: List[NativeFunction] = []
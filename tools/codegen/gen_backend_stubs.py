@@ -1,9 +1,15 @@
 import pathlib
 import argparse
+import concurrent.futures
+import functools
+import hashlib
+import itertools
+import json
 import os
+import pickle
 import yaml
-from typing import List, Dict, Union, Tuple, Sequence
-from tools.codegen.gen import FileManager, get_grouped_native_functions, LineLoader, parse_native_yaml
+from typing import List, Dict, Union, Tuple, Sequence, Optional, Callable
+from tools.codegen.gen import FileManager, get_grouped_native_functions, LineLoader
 from tools.codegen.model import (ExternalBackendFunction, ExternalBackendFunctionsGroup,
                                  NativeFunction, NativeFunctionsGroup, OperatorName,
                                  ExternalBackendMetadata, assert_never)
@@ -11,12 +17,38 @@ from tools.codegen.selective_build.selector import SelectiveBuilder
 from tools.codegen.utils import Target, concatMap
 import tools.codegen.dest as dest
 
+def get_native_functions_map(
+        grouped_native_functions: Sequence[Union[NativeFunction, NativeFunctionsGroup]]
+) -> Dict[OperatorName, NativeFunction]:
+    native_functions_map: Dict[OperatorName, NativeFunction] = {}
+    for g in grouped_native_functions:
+        if isinstance(g, NativeFunction):
+            native_functions_map[g.func.name] = g
+        else:
+            for f in g.functions():
+                native_functions_map[f.func.name] = f
+    return native_functions_map
+
+# A JSON rendering of the backend yaml parses much faster, so prefer one
+# sitting next to it as long as it isn't older than the yaml.
+def get_backend_spec_path(backend_yaml_path: str) -> str:
+    json_path = os.path.splitext(backend_yaml_path)[0] + '.json'
+    if os.path.exists(json_path) and os.path.getmtime(json_path) >= os.path.getmtime(backend_yaml_path):
+        return json_path
+    return backend_yaml_path
+
 def parse_backend_yaml(
         backend_yaml_path: str,
-        grouped_native_functions: Sequence[Union[NativeFunction, NativeFunctionsGroup]]
+        grouped_native_functions: Sequence[Union[NativeFunction, NativeFunctionsGroup]],
+        native_functions_map: Dict[OperatorName, NativeFunction]
 ) -> Tuple[str, List[Union[ExternalBackendFunction, ExternalBackendFunctionsGroup]]]:
-    with open(backend_yaml_path, 'r') as f:
-        yaml_values = yaml.load(f, Loader=LineLoader)
+    spec_path = get_backend_spec_path(backend_yaml_path)
+    if spec_path != backend_yaml_path:
+        with open(spec_path, 'rb') as f:
+            yaml_values = json.load(f)
+    else:
+        with open(backend_yaml_path, 'rb') as f:
+            yaml_values = yaml.load(f, Loader=LineLoader)
     assert isinstance(yaml_values, dict)
 
     cpp_namespace = yaml_values.pop('cpp_namespace')
@@ -25,25 +57,21 @@ def parse_backend_yaml(
     supported = yaml_values.pop('supported', [])
     assert isinstance(supported, list), f'expected "supported" to be a list, but got: {supported}'
     supported_autograd = yaml_values.pop('autograd', [])
-    assert isinstance(supported, list), f'expected "autograd" to be a list, but got: {supported_autograd}'
-
-    assert len(yaml_values.keys()) > 0, \
-        f'{backend_yaml_path} contains unexpected keys: {", ".join(yaml_values.keys())}'
-
-    metadata: Dict[OperatorName, ExternalBackendMetadata] = {}
-    for op in supported:
-        op_name = OperatorName.parse(op)
-        m = ExternalBackendMetadata(op_name, backend, is_autograd=False)
-        metadata[m.operator] = m
-    for op in supported_autograd:
-        op_name = OperatorName.parse(op)
-        m = ExternalBackendMetadata(op_name, backend, is_autograd=True)
-        metadata[m.operator] = m
-
-    native_functions_map: Dict[OperatorName, NativeFunction] = {
-        f.func.name: f
-        for f in concatMap(lambda f: [f] if isinstance(f, NativeFunction) else list(f.functions()), grouped_native_functions)
+    assert isinstance(supported_autograd, list), f'expected "autograd" to be a list, but got: {supported_autograd}'
+
+    # LineLoader tags every mapping with its line number; a JSON file won't have it
+    yaml_values.pop('__line__', None)
+    assert len(yaml_values.keys()) == 0, \
+        f'{spec_path} contains unexpected keys: {", ".join(yaml_values.keys())}'
+
+    metadata: Dict[OperatorName, ExternalBackendMetadata] = {
+        op_name: ExternalBackendMetadata(op_name, backend, is_autograd=False, structured=False)
+        for op_name in map(OperatorName.parse, supported)
     }
+    metadata.update({
+        op_name: ExternalBackendMetadata(op_name, backend, is_autograd=True, structured=False)
+        for op_name in map(OperatorName.parse, supported_autograd)
+    })
 
     def native_to_external(
             g: Union[NativeFunction, NativeFunctionsGroup]
@@ -56,11 +84,112 @@ def parse_backend_yaml(
             return ExternalBackendFunctionsGroup.from_function_group(g, metadata)
         else:
             assert_never(g)
-    for op_name in metadata.keys():
-        if op_name not in native_functions_map:
-            raise AssertionError(f"Found an invalid operator name: {op_name}")
+    # Validate every operator at once with a set difference rather than per op
+    invalid_ops = metadata.keys() - native_functions_map.keys()
+    if invalid_ops:
+        raise AssertionError(f"Found invalid operator names: {', '.join(sorted(str(op) for op in invalid_ops))}")
     return cpp_namespace, [native_to_external(g) for g in grouped_native_functions]
 
+# A digest of everything the generated files depend on: the given input
+# files plus the source of the code generator itself.
+def compute_codegen_key(input_paths: Sequence[str]) -> str:
+    codegen_dir = pathlib.Path(__file__).parent
+    h = hashlib.blake2b()
+    for path in itertools.chain(input_paths, sorted(str(p) for p in codegen_dir.rglob('*.py'))):
+        h.update(path.encode())
+        h.update(pathlib.Path(path).read_bytes())
+    return h.hexdigest()
+
+# Parsing native_functions.yaml dominates the runtime of this script, so we
+# pickle the grouped result into the output directory and reuse it as long as
+# neither the yaml file, the code generator nor the yaml library has changed.
+def get_grouped_native_functions_cached(
+        native_yaml_path: str,
+        cache_dir: str
+) -> Sequence[Union[NativeFunction, NativeFunctionsGroup]]:
+    key = (compute_codegen_key([native_yaml_path]), yaml.__version__)
+    cache_path = os.path.join(cache_dir, '.native_functions.pkl')
+    try:
+        with open(cache_path, 'rb') as f:
+            cached_key, grouped_native_functions = pickle.load(f)
+        if cached_key == key:
+            return grouped_native_functions  # type: ignore[no-any-return]
+    except Exception:
+        # A missing, stale or corrupt cache just means we reparse
+        pass
+
+    grouped_native_functions = get_grouped_native_functions(native_yaml_path)
+    try:
+        with open(cache_path, 'wb') as f:
+            pickle.dump((key, grouped_native_functions), f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass
+    return grouped_native_functions
+
+GENERATED_COMMENT = 'Autogenerated file by gen_backend_stubs.py. Do not edit directly!'
+
+def compute_aten_xla_type_h(
+        cpp_namespace: str,
+        external_backend_functions: Sequence[Union[ExternalBackendFunction, ExternalBackendFunctionsGroup]]
+) -> Dict[str, object]:
+    return {
+        'generated_comment': GENERATED_COMMENT,
+        'cpp_namespace': cpp_namespace,
+        # The declarations are static members of a class, so a repeated one would
+        # fail to compile. Dedup in a single pass, keeping the first occurrence
+        # so the generated header stays deterministic.
+        'dispatch_xla_declarations': list(dict.fromkeys(
+            concatMap(dest.compute_native_function_declaration, external_backend_functions)
+        )),
+    }
+
+def compute_aten_xla_type_default_h(
+        cpp_namespace: str,
+        external_backend_functions: Sequence[Union[ExternalBackendFunction, ExternalBackendFunctionsGroup]]
+) -> Dict[str, object]:
+    return {
+        'generated_comment': GENERATED_COMMENT,
+        'cpp_namespace': cpp_namespace,
+        'dispatch_aten_fallback_declarations': list(concatMap(
+            dest.GenExternalAtenFallback(Target.NAMESPACED_DECLARATION), external_backend_functions
+        )),
+    }
+
+def compute_aten_xla_type_default_cpp(
+        cpp_namespace: str,
+        external_backend_functions: Sequence[Union[ExternalBackendFunction, ExternalBackendFunctionsGroup]]
+) -> Dict[str, object]:
+    return {
+        'generated_comment': GENERATED_COMMENT,
+        'cpp_namespace': cpp_namespace,
+        # TODO: after cpu fallbacks are moved to a boxed kernel,
+        # merge registrations / definitions into RegisterDispatchKey
+        'dispatch_aten_fallback_definitions': list(concatMap(
+            dest.GenExternalAtenFallback(Target.NAMESPACED_DEFINITION), external_backend_functions
+        )),
+        'dispatch_registrations': list(concatMap(
+            dest.GenExternalAtenFallback(Target.REGISTRATION), [e for e in external_backend_functions if not e.is_autograd_kernel]
+        )),
+        'dispatch_autograd_registrations': list(concatMap(
+            dest.GenExternalAtenFallback(Target.REGISTRATION), [e for e in external_backend_functions if e.is_autograd_kernel]
+        )),
+    }
+
+# Per-process inputs for _compute_env, set up by _init_env_worker
+_worker_inputs: Optional[Tuple[str, Sequence[Union[ExternalBackendFunction, ExternalBackendFunctionsGroup]]]] = None
+
+def _init_env_worker(
+        cpp_namespace: str,
+        external_backend_functions: Sequence[Union[ExternalBackendFunction, ExternalBackendFunctionsGroup]]
+) -> None:
+    global _worker_inputs
+    _worker_inputs = (cpp_namespace, external_backend_functions)
+
+def _compute_env(env_fn: Callable[[str, Sequence[Union[ExternalBackendFunction, ExternalBackendFunctionsGroup]]],
+                                  Dict[str, object]]) -> Dict[str, object]:
+    assert _worker_inputs is not None
+    return env_fn(*_worker_inputs)
+
 def main() -> None:
     parser = argparse.ArgumentParser(description='Generate backend stub files')
     parser.add_argument(
@@ -82,45 +211,69 @@ def main() -> None:
 
     fm = make_file_manager(options.output_dir)
 
+    env_fns = [
+        ('aten_xla_type.h', compute_aten_xla_type_h),
+        ('aten_xla_type_default.h', compute_aten_xla_type_default_h),
+        ('aten_xla_type_default.cpp', compute_aten_xla_type_default_cpp),
+    ]
+
     native_yaml_path = os.path.join(pytorch_root, 'aten/src/ATen/native/native_functions.yaml')
-    grouped_native_functions = get_grouped_native_functions(native_yaml_path)
-    cpp_namespace, external_backend_functions = parse_backend_yaml(options.source_yaml, grouped_native_functions)
 
-    native_functions = parse_native_yaml(native_yaml_path)
+    # Skip everything, including parsing native_functions.yaml, when none of
+    # the inputs changed since the last run that produced the current outputs.
+    codegen_key = compute_codegen_key(
+        [native_yaml_path, get_backend_spec_path(options.source_yaml)] + [os.path.join(template_dir, fn) for fn, _ in env_fns])
+    codegen_key_path = os.path.join(options.output_dir, '.codegen_key')
+    if not options.dry_run and \
+            all(os.path.exists(os.path.join(options.output_dir, fn)) for fn, _ in env_fns):
+        try:
+            with open(codegen_key_path, 'r') as f:
+                if f.read() == codegen_key:
+                    return
+        except IOError:
+            pass
+
+    if options.dry_run:
+        grouped_native_functions = get_grouped_native_functions(native_yaml_path)
+    else:
+        grouped_native_functions = get_grouped_native_functions_cached(native_yaml_path, options.output_dir)
+    native_functions_map = get_native_functions_map(grouped_native_functions)
+    cpp_namespace, external_backend_functions = parse_backend_yaml(
+        options.source_yaml, grouped_native_functions, native_functions_map)
 
     selector = SelectiveBuilder.get_nop_selector()
 
 
-    generated_comment = 'Autogenerated file by gen_backend_stubs.py. Do not edit directly!'
-    fm.write('aten_xla_type.h', lambda: {
-        'generated_comment': generated_comment,
-        'cpp_namespace': cpp_namespace,
-        'dispatch_xla_declarations': list(concatMap(dest.compute_native_function_declaration, external_backend_functions)),
-    })
+    # Drop the key before touching any output: if rendering fails partway, the
+    # outputs already rewritten must not be mistaken for up to date next time.
+    if not options.dry_run:
+        try:
+            os.remove(codegen_key_path)
+        except FileNotFoundError:
+            pass
 
-    fm.write('aten_xla_type_default.h', lambda: {
-        'generated_comment': generated_comment,
-        'cpp_namespace': cpp_namespace,
-        'dispatch_aten_fallback_declarations': list(concatMap(
-            dest.GenExternalAtenFallback(Target.NAMESPACED_DECLARATION), external_backend_functions
-        )),
-    })
+    if options.dry_run or (os.cpu_count() or 1) == 1:
+        # A dry run never evaluates the environments, and a single core gains
+        # nothing from a process pool, so render inline.
+        for filename, env_fn in env_fns:
+            fm.write(filename, functools.partial(env_fn, cpp_namespace, external_backend_functions))
+    else:
+        # Each output file is a pure function of the external backend functions,
+        # so render them in parallel; the work is CPU bound, hence processes.
+        # The functions are handed to each worker once through the initializer
+        # (inherited rather than pickled where processes are forked) instead of
+        # being pickled again for every file.
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=len(env_fns),
+                initializer=_init_env_worker,
+                initargs=(cpp_namespace, external_backend_functions)) as executor:
+            futures = [(filename, executor.submit(_compute_env, env_fn)) for filename, env_fn in env_fns]
+            for filename, future in futures:
+                fm.write(filename, future.result)
 
-    fm.write('aten_xla_type_default.cpp', lambda: {
-        'generated_comment': generated_comment,
-        'cpp_namespace': cpp_namespace,
-        # TODO: after cpu fallbacks are moved to a boxed kernel,
-        # merge registrations / definitions into RegisterDispatchKey
-        'dispatch_aten_fallback_definitions': list(concatMap(
-            dest.GenExternalAtenFallback(Target.NAMESPACED_DEFINITION), external_backend_functions
-        )),
-        'dispatch_registrations': list(concatMap(
-            dest.GenExternalAtenFallback(Target.REGISTRATION), [e for e in external_backend_functions if not e.is_autograd_kernel]
-        )),
-        'dispatch_autograd_registrations': list(concatMap(
-            dest.GenExternalAtenFallback(Target.REGISTRATION), [e for e in external_backend_functions if e.is_autograd_kernel]
-        )),
-    })
+    if not options.dry_run:
+        with open(codegen_key_path, 'w') as f:
+            f.write(codegen_key)
 
 if __name__ == '__main__':
     main()
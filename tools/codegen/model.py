@@ -3,6 +3,7 @@ import re
 from dataclasses import dataclass
 from typing import List, Dict, Optional, Iterator, Tuple, Set, NoReturn, Sequence, Callable, Union
 from enum import Enum, auto
+import functools
 import itertools
 
 # A little trick from https://github.com/python/mypy/issues/6366
@@ -120,10 +121,11 @@ class DispatchKey(Enum):
 
     @staticmethod
     def parse(value: str) -> 'DispatchKey':
-        for k, v in DispatchKey.__members__.items():
-            if k == value:
-                return v
-        raise AssertionError(f'unknown dispatch key {value}')
+        # Enum name lookup is a dict lookup (aliases like CatchAll included)
+        try:
+            return DispatchKey[value]
+        except KeyError:
+            raise AssertionError(f'unknown dispatch key {value}') from None
 
 STRUCTURED_DISPATCH_KEYS = {DispatchKey.CUDA, DispatchKey.CPU}
 
@@ -1324,7 +1326,11 @@ class OperatorName:
     name: BaseOperatorName
     overload_name: str
 
+    # The same operator strings get parsed repeatedly (structured_delegate
+    # entries, backend yamls naming native operators), and OperatorName is
+    # immutable, so share the parsed result.
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def parse(op_name: str) -> 'OperatorName':
         if '.' in op_name:
             name, overload_name = op_name.split('.', 1)
@@ -1344,14 +1350,23 @@ class OperatorName:
         else:
             return f"{self.name}"
 
+# One of these is created per operator a backend yaml lists, so it is slotted
+# to avoid carrying a __dict__ per instance.  Slots can't coexist with field
+# defaults, so 'structured' has to be passed explicitly.
 @dataclass(frozen=True)
 class ExternalBackendMetadata:
+    __slots__ = ('operator', 'backend', 'is_autograd', 'structured')
 
     operator: OperatorName
     backend: str
     is_autograd: bool
 
-    structured: bool = False  # TODO: this will eventually become per-op metadata in the yaml file
+    structured: bool  # TODO: this will eventually become per-op metadata in the yaml file
+
+    # The default pickling of slotted objects restores state with setattr,
+    # which a frozen dataclass rejects; rebuild through __init__ instead.
+    def __reduce__(self) -> Tuple[Callable[..., 'ExternalBackendMetadata'], Tuple[OperatorName, str, bool, bool]]:
+        return (ExternalBackendMetadata, (self.operator, self.backend, self.is_autograd, self.structured))
 
 @dataclass(frozen=True)
 class ExternalBackendFunction:
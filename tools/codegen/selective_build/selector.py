@@ -8,6 +8,12 @@ from tools.codegen.selective_build.operator import (
     SelectiveBuildOperator, merge_debug_info, merge_operator_dicts,
     strip_operator_overload_name)
 
+try:
+    # use faster C loader if available
+    from yaml import CSafeLoader as Loader
+except ImportError:
+    from yaml import SafeLoader as Loader  # type: ignore[misc]
+
 # A SelectiveBuilder holds information extracted from the selective build
 # YAML specification.
 #
@@ -97,13 +103,13 @@ class SelectiveBuilder:
 
     @staticmethod
     def from_yaml_str(config_contents: str) -> 'SelectiveBuilder':
-        contents = yaml.safe_load(config_contents)
+        contents = yaml.load(config_contents, Loader=Loader)
         return SelectiveBuilder.from_yaml_dict(contents)
 
     @staticmethod
     def from_yaml_path(config_path: str) -> 'SelectiveBuilder':
         with open(config_path, 'r') as f:
-            contents = yaml.safe_load(f)
+            contents = yaml.load(f, Loader=Loader)
             return SelectiveBuilder.from_yaml_dict(contents)
 
     @staticmethod
@@ -2,6 +2,7 @@ import re
 from typing import Tuple, List, Iterable, Iterator, Callable, Sequence, TypeVar, Optional
 from enum import Enum
 import contextlib
+import itertools
 import textwrap
 
 # Many of these functions share logic for defining both the definition
@@ -51,10 +52,9 @@ def mapMaybe(func: Callable[[T], Optional[S]], xs: Iterable[T]) -> Iterator[S]:
             yield r
 
 # Map over function that returns sequences and cat them all together
+# (flattened by itertools in C rather than by a nested generator)
 def concatMap(func: Callable[[T], Sequence[S]], xs: Iterable[T]) -> Iterator[S]:
-    for x in xs:
-        for r in func(x):
-            yield r
+    return itertools.chain.from_iterable(map(func, xs))
 
 # Conveniently add error context to exceptions raised.  Lets us
 # easily say that an error occurred while processing a specific
@@ -0,0 +1,80 @@
+import os
+import sys
+import tempfile
+import unittest
+import unittest.mock
+from typing import Dict, List
+
+from tools.codegen import gen_backend_stubs
+
+OUTPUT_FILES = ['aten_xla_type.h', 'aten_xla_type_default.h', 'aten_xla_type_default.cpp']
+
+
+class TestGenBackendStubs(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source_yaml = os.path.join(self.tmp.name, 'xla_native_functions.yaml')
+        self.output_dir = os.path.join(self.tmp.name, 'out')
+        os.mkdir(self.output_dir)
+        # Render inline so failures injected below surface in this process
+        patcher = unittest.mock.patch('os.cpu_count', return_value=1)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def write_source_yaml(self, supported: List[str]) -> None:
+        with open(self.source_yaml, 'w') as f:
+            f.write('backend: XLA\ncpp_namespace: torch_xla\nsupported:\n')
+            f.write(''.join(f'- {op}\n' for op in supported))
+
+    def run_main(self) -> None:
+        argv = ['gen_backend_stubs.py', '-s', self.source_yaml, '-o', self.output_dir]
+        with unittest.mock.patch.object(sys, 'argv', argv):
+            gen_backend_stubs.main()
+
+    def read_outputs(self) -> Dict[str, str]:
+        outputs = {}
+        for filename in OUTPUT_FILES:
+            with open(os.path.join(self.output_dir, filename), 'r') as f:
+                outputs[filename] = f.read()
+        return outputs
+
+    def test_unchanged_inputs_skip_generation(self) -> None:
+        self.write_source_yaml(['abs', 'add.Tensor'])
+        self.run_main()
+        outputs = self.read_outputs()
+
+        with unittest.mock.patch.object(
+                gen_backend_stubs, 'parse_backend_yaml', wraps=gen_backend_stubs.parse_backend_yaml) as parse:
+            self.run_main()
+            parse.assert_not_called()
+        self.assertEqual(self.read_outputs(), outputs)
+
+        # Changing an input regenerates the outputs
+        self.write_source_yaml(['abs', 'add.Tensor', 'abs_'])
+        self.run_main()
+        self.assertIn('abs_(', self.read_outputs()['aten_xla_type.h'])
+
+    def test_failed_run_does_not_leave_stale_outputs(self) -> None:
+        self.write_source_yaml(['abs'])
+        self.run_main()
+        outputs = self.read_outputs()
+
+        # Fail after the headers have been rewritten for the new inputs
+        self.write_source_yaml(['abs', 'add.Tensor'])
+        with unittest.mock.patch.object(
+                gen_backend_stubs, 'compute_aten_xla_type_default_cpp', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                self.run_main()
+        self.assertNotEqual(self.read_outputs()['aten_xla_type.h'], outputs['aten_xla_type.h'])
+
+        # Reverting the inputs must regenerate the headers, not skip
+        self.write_source_yaml(['abs'])
+        self.run_main()
+        self.assertEqual(self.read_outputs(), outputs)
+
+
+if __name__ == '__main__':
+    unittest.main()